@@ -1,103 +1,276 @@
 import os
+import atexit
+import asyncio
+import hashlib
 import httpx
-import json
+import logging
+import orjson
+import re
 import sys
+from cachetools import TTLCache
 from mcp.server.fastmcp import FastMCP
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Union
+
+# Log to stderr so stdout stays clean for the stdio transport. Debug
+# messages are only formatted when LOG_LEVEL enables them.
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), stream=sys.stderr)
+logger = logging.getLogger(__name__)
 
 # Initialize MCP Server
 mcp = FastMCP("catalysishub", version="0.1.0")
-print("Catalysis Hub MCP Server initialized.", file=sys.stderr)
+logger.info("Catalysis Hub MCP Server initialized.")
 
 # Catalysis Hub API Configuration
 GRAPHQL_ROOT = 'http://api.catalysis-hub.org/graphql'
 
-async def execute_graphql_query(query: str, variables: Dict[str, Any] = None) -> Dict[str, Any]:
+# Shared HTTP client so keep-alive connections are reused across tool calls
+# instead of paying a fresh TCP handshake on every request. Created lazily on
+# the running event loop; the lock stops concurrent first calls from racing
+# to build duplicate clients.
+_http_client: Optional[httpx.AsyncClient] = None
+_http_client_lock = asyncio.Lock()
+
+async def _get_http_client() -> httpx.AsyncClient:
+    """Return the shared AsyncClient, creating it on first use."""
+    global _http_client
+    if _http_client is not None and not _http_client.is_closed:
+        return _http_client
+    async with _http_client_lock:
+        # Re-check inside the lock: another caller may have won the race.
+        if _http_client is None or _http_client.is_closed:
+            _http_client = httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+                timeout=httpx.Timeout(30.0, connect=5.0),
+                headers={
+                    "Content-Type": "application/json",
+                    "User-Agent": "MCPCatalysisHubServer/0.1.0",
+                    "Accept-Encoding": "gzip, br"
+                }
+            )
+    return _http_client
+
+def _close_http_client():
+    """Close the shared client on interpreter shutdown."""
+    if _http_client is not None and not _http_client.is_closed:
+        try:
+            asyncio.run(_http_client.aclose())
+        except RuntimeError:
+            pass
+
+atexit.register(_close_http_client)
+
+# Matches an operation that starts with the mutation keyword, without
+# copying the (possibly multi-KB) query via strip()/lower().
+_MUTATION_RE = re.compile(r"^\s*mutation\b", re.IGNORECASE)
+
+# In-flight requests keyed by query+variables hash; concurrent identical
+# queries await the leader's result instead of each hitting the API.
+_inflight: Dict[str, asyncio.Future] = {}
+
+# Short-lived response cache for read-only queries. Introspection and
+# catalog lookups are effectively static over minutes, so repeats can skip
+# the round-trip entirely. Mutations and error responses are never cached.
+_response_cache: TTLCache = TTLCache(maxsize=256, ttl=300)
+_response_cache_lock = asyncio.Lock()
+
+def _request_key(query: str, variables: Dict[str, Any]) -> str:
+    """Builds a stable cache/dedup key for a query and its variables."""
+    raw = query.encode() + b"\x00" + orjson.dumps(variables, option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+async def execute_graphql_query(query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Executes a GraphQL query against Catalysis Hub's API, collapsing
+    identical concurrent queries into a single upstream request and
+    serving recent read-only results from a short-lived cache.
+    Mutations bypass both the cache and deduplication. The caller is
+    responsible for normalizing variables to a dict.
+    """
+    if _MUTATION_RE.match(query):
+        return await _post_graphql_query(query, variables)
+
+    key = _request_key(query, variables)
+
+    async with _response_cache_lock:
+        cached = _response_cache.get(key)
+    if cached is not None:
+        logger.debug("Returning cached GraphQL response")
+        return cached
+
+    existing = _inflight.get(key)
+    if existing is not None:
+        logger.debug("Joining in-flight request for identical query")
+        return await existing
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        result = await _post_graphql_query(query, variables)
+        if "errors" not in result:
+            async with _response_cache_lock:
+                _response_cache[key] = result
+        future.set_result(result)
+        return result
+    finally:
+        if not future.done():
+            future.cancel()
+        _inflight.pop(key, None)
+
+async def _post_graphql_query(query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
     """
     Executes a GraphQL query against Catalysis Hub's API.
     Handles error checking and response formatting.
     """
+    return await _post_graphql_payload({"query": query, "variables": variables})
+
+async def execute_graphql_batch(queries: List[str], variables: Dict[str, Any]) -> Any:
+    """
+    Executes several GraphQL queries as a single batched request (array
+    payload), so N queries cost one round-trip. The variables dict is
+    applied to every query in the batch.
+    """
+    return await _post_graphql_payload(
+        [{"query": q, "variables": variables} for q in queries]
+    )
+
+async def _post_graphql_payload(data: Any) -> Any:
+    """
+    Posts a GraphQL payload (single operation dict or batch list) to
+    Catalysis Hub. Handles error checking and response formatting.
+    """
     try:
-        headers = {
-            "Content-Type": "application/json",
-            "User-Agent": "MCPCatalysisHubServer/0.1.0"
-        }
-        
-        data = {
-            "query": query
-        }
-        
-        if variables:
-            data["variables"] = variables
-        
-        print(f"Debug - Making GraphQL request to: {GRAPHQL_ROOT}", file=sys.stderr)
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                GRAPHQL_ROOT,
-                headers=headers,
-                json=data,
-                timeout=30.0
-            )
-            
-            print(f"Debug - API response status: {response.status_code}", file=sys.stderr)
-            
-            response.raise_for_status()
-            result = response.json()
-            
-            return result
+        logger.debug("Making GraphQL request to: %s", GRAPHQL_ROOT)
+
+        client = await _get_http_client()
+        payload = orjson.dumps(data)
+
+        # Send optimistically and retry exactly once on transient failures
+        # (connection errors or 5xx) rather than pre-checking anything on
+        # the hot path; queries are idempotent reads.
+        for attempt in range(2):
+            # Stream the body into a single growable buffer so large
+            # introspection payloads are not materialized twice (once by
+            # httpx, once by the parser) before decoding.
+            buf = bytearray()
+            try:
+                async with client.stream(
+                    "POST",
+                    GRAPHQL_ROOT,
+                    content=payload
+                ) as response:
+                    logger.debug("API response status: %s", response.status_code)
+                    async for chunk in response.aiter_bytes(65536):
+                        buf.extend(chunk)
+            except httpx.RequestError as e:
+                if attempt == 0:
+                    logger.warning("Transient request error, retrying once: %s", e)
+                    continue
+                raise
+            if response.status_code >= 500 and attempt == 0:
+                logger.warning("Server error %s, retrying once", response.status_code)
+                continue
+            break
+
+        if response.is_error:
+            return _format_status_error(response.status_code, bytes(buf))
+
+        result = orjson.loads(buf)
+
+        return result
     except httpx.RequestError as e:
-        print(f"HTTP Request Error: {e}", file=sys.stderr)
+        logger.error("HTTP Request Error: %s", e)
         return {"errors": [{"message": f"HTTP Request Error connecting to Catalysis Hub: {e}"}]}
-    except httpx.HTTPStatusError as e:
-        print(f"HTTP Status Error: {e.response.status_code} - {e.response.text}", file=sys.stderr)
-        error_detail = f"HTTP Status Error: {e.response.status_code}"
-        try:
-            # Try to parse error response if JSON
-            err_resp = e.response.json()
-            if "errors" in err_resp:
-                error_detail += f" - {err_resp['errors'][0]['message']}"
-            elif "error" in err_resp and "message" in err_resp["error"]:
-                error_detail += f" - {err_resp['error']['message']}"
-            else:
-                error_detail += f" - Response: {e.response.text[:200]}"
-        except json.JSONDecodeError:
-            error_detail += f" - Response: {e.response.text[:200]}"
-        
-        return {"errors": [{"message": error_detail}]}
     except Exception as e:
-        print(f"Generic Error during Catalysis Hub request: {e}", file=sys.stderr)
+        logger.error("Generic Error during Catalysis Hub request: %s", e)
         return {"errors": [{"message": f"An unexpected error occurred: {e}"}]}
 
+def _format_status_error(status_code: int, body: bytes) -> Dict[str, Any]:
+    """Builds the error payload for a non-2xx response from its buffered body."""
+    logger.error("HTTP Status Error: %s - %s", status_code, body[:500].decode(errors="replace"))
+    error_detail = f"HTTP Status Error: {status_code}"
+
+    # Parse the body exactly once; probe the resulting dict for the known
+    # error shapes and fall back to a truncated raw excerpt.
+    try:
+        err_resp = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        err_resp = None
+
+    if isinstance(err_resp, dict) and "errors" in err_resp:
+        error_detail += f" - {err_resp['errors'][0]['message']}"
+    elif isinstance(err_resp, dict) and "error" in err_resp and "message" in err_resp["error"]:
+        error_detail += f" - {err_resp['error']['message']}"
+    else:
+        error_detail += f" - Response: {body[:200].decode(errors='replace')}"
+
+    return {"errors": [{"message": error_detail}]}
+
 @mcp.tool()
-async def catalysishub_graphql(query: str, variables: Dict[str, Any] = None) -> str:
+async def catalysishub_graphql(query: Union[str, List[str]], variables: Dict[str, Any] = None) -> str:
     """
     Execute any GraphQL query against the Catalysis Hub API.
-    
+
     This single flexible tool allows executing any valid GraphQL query against the Catalysis Hub API,
     leveraging GraphQL's introspection capabilities to discover the schema and available operations.
-    
+    Passing a list of queries executes them as one batched request, saving a
+    round-trip per extra query.
+
     Examples of queries:
     - List reactions: {reactions(first:10) {edges {node {id Equation}}}}
     - Search publications: {publications(first:10, year:2017) {edges {node {title doi}}}}
     - Get material details: {systems(uniqueId:"id") {edges {node {energy Cifdata}}}}
-    
+
     Args:
-        query: The GraphQL query to execute (required)
+        query: The GraphQL query to execute (required); a list of queries is
+            sent as a single batched request
         variables: Optional dictionary of variables for the GraphQL query
-        
+
     Returns:
         JSON string containing the query results
     """
-    print(f"Executing catalysishub_graphql with query: {query[:100]}...", file=sys.stderr)
-    
-    result = await execute_graphql_query(query, variables)
-    
-    return json.dumps(result)
+    variables = variables or {}
+
+    if isinstance(query, list):
+        logger.debug("Executing catalysishub_graphql with batch of %d queries", len(query))
+        result = await execute_graphql_batch(query, variables)
+    else:
+        logger.debug("Executing catalysishub_graphql with query: %.100s...", query)
+        result = await execute_graphql_query(query, variables)
+
+    return orjson.dumps(result).decode()
+
+async def _warm_connection():
+    """
+    Issues a trivial query before the stdio loop starts, so DNS resolution
+    happens (and unreachability is logged) ahead of the first real request.
+    """
+    global _http_client
+    result = await execute_graphql_query("{__typename}", {})
+    if "errors" in result:
+        logger.warning("Startup warm-up query failed: %s", result["errors"][0]["message"])
+    else:
+        logger.info("Catalysis Hub API reachable.")
+    # This loop is about to close; drop its client so the serving loop
+    # lazily builds its own.
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
 
 if __name__ == "__main__":
-    print("Running Catalysis Hub MCP server via stdio...", file=sys.stderr)
+    try:
+        import uvloop
+        uvloop.install()
+        logger.info("Using uvloop event loop.")
+    except ImportError:
+        # Not available on Windows; the default asyncio loop works fine.
+        pass
+    try:
+        asyncio.run(_warm_connection())
+    except Exception as e:
+        logger.warning("Startup warm-up failed: %s", e)
+    logger.info("Running Catalysis Hub MCP server via stdio...")
     try:
         mcp.run(transport='stdio')
     except Exception as e:
-        print(f"Fatal error running MCP server: {e}", file=sys.stderr) 
\ No newline at end of file
+        logger.error("Fatal error running MCP server: %s", e) 
\ No newline at end of file